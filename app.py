@@ -1,17 +1,67 @@
 from moviepy import *
 import numpy as np
+from PIL import Image, ImageDraw, ImageFont
 from fastapi import FastAPI, Body, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional, Dict, Any
-import requests
+import aiohttp
+import aiofiles
+import aiofiles.os
+import asyncio
 import os
+import re
 import uuid
+import hashlib
+import time
+import subprocess
+import functools
+import shutil
+import multiprocessing
+from contextlib import asynccontextmanager
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from moviepy import *
+from moviepy.config import FFMPEG_BINARY
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+# Number of processes rendering videos at the same time
+RENDER_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+
+def create_process_pool() -> ProcessPoolExecutor:
+    """
+    Create the pool of processes that render videos.
+    """
+    # Forking the API process is unsafe once it runs threads, so start
+    # workers from a clean forkserver (or spawn where that's unavailable)
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context(method))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared HTTP session so connections to the same host are reused
+    app.state.http_session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=64, limit_per_host=16),
+        # No overall limit since videos can be large, but don't wait forever on a stalled server
+        timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=60)
+    )
+    # Video rendering is CPU bound, so it runs in separate processes
+    # to keep the API process responsive
+    app.state.process_pool = create_process_pool()
+    # Downloads of this process live in their own directory, so several server
+    # workers never delete files another worker is still rendering. Picked
+    # here rather than at import, since workers may be forked after importing.
+    app.state.download_dir = os.path.join("downloads", str(os.getpid()))
+    await asyncio.to_thread(clean_downloads, app.state.download_dir)
+    yield
+    await app.state.http_session.close()
+    # Let running renders finish without blocking the event loop
+    await asyncio.to_thread(app.state.process_pool.shutdown, cancel_futures=True)
+    await asyncio.to_thread(shutil.rmtree, app.state.download_dir, ignore_errors=True)
+
+app = FastAPI(lifespan=lifespan)
 
 # Add CORS middleware to allow requests from any origin
 app.add_middleware(
@@ -26,22 +76,128 @@ app.add_middleware(
 os.makedirs("downloads", exist_ok=True)
 os.makedirs("output", exist_ok=True)
 
-# Mount the output directory to serve files
+# Mount the output directory to serve files. StaticFiles answers Range
+# requests and uses sendfile where available, and the videos are written
+# with +faststart so playback can begin before the whole file arrives.
 app.mount("/videos", StaticFiles(directory="output"), name="videos")
 
-# Base URL for video files - change this to your domain in production
-BASE_URL = "http://localhost:8000"
+# Base URL for video files - set BASE_URL to your domain in production
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000").rstrip("/")
+
+# Font used for the captions
+FONT_PATH = "./font/font.ttf"
+
+# Download chunk size and file write buffer size
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+DOWNLOAD_BUFFER_SIZE = 1 << 22
+
+# Number of parallel range requests per download, and the minimum file
+# size for which splitting the download is worth it
+DOWNLOAD_PARTS = 8
+MIN_PARALLEL_DOWNLOAD_SIZE = 8 << 20
+
+# Number of downloaded source videos kept on disk for repeated requests,
+# and how many seconds an unused download is kept
+DOWNLOAD_CACHE_SIZE = 32
+DOWNLOAD_CACHE_TTL = 3600
+
+# Source video URL -> (local file path, last use time), least recently used first.
+# Only touched from the event loop thread, so it needs no lock.
+download_cache: "OrderedDict[str, tuple]" = OrderedDict()
+
+# Source video URL -> number of requests currently using its file.
+# Pinned entries are never evicted.
+download_pins: Dict[str, int] = {}
+
+# Hardware H.264 encoders in order of preference, with the preset and
+# rate-control parameters to pass to ffmpeg for each of them
+HW_ENCODERS = {
+    "h264_nvenc": ("p4", ["-rc", "vbr", "-b:v", "5M"]),
+    "h264_videotoolbox": ("medium", ["-b:v", "5M"]),
+    "h264_amf": ("balanced", ["-rc", "vbr_peak", "-b:v", "5M"]),
+}
+
+# Software fallback when no hardware encoder is usable
+SW_ENCODER = ("libx264", "veryfast", ["-crf", "23"])
+
+# Regular keyframe placement without scene-cut or B-frames, so the encoder
+# can run on the single continuous stream without extra IDR frames
+GOP_PARAMS = ["-g", "120", "-keyint_min", "24", "-sc_threshold", "0", "-bf", "0"]
+
+@functools.lru_cache(maxsize=None)
+def detect_video_encoder() -> tuple:
+    """
+    Return (codec, preset, ffmpeg_params) for the fastest usable H.264 encoder.
+    The result is cached so ffmpeg is only probed once per process.
+    """
+    try:
+        listing = subprocess.run(
+            [FFMPEG_BINARY, "-hide_banner", "-encoders"],
+            capture_output=True, text=True, timeout=10
+        ).stdout
+    except Exception:
+        return SW_ENCODER
+
+    for codec, (preset, params) in HW_ENCODERS.items():
+        if codec not in listing:
+            continue
+        # An encoder being compiled in doesn't mean the hardware is present,
+        # so make sure it can actually encode a few frames
+        try:
+            probe = subprocess.run(
+                [FFMPEG_BINARY, "-hide_banner", "-f", "lavfi",
+                 "-i", "color=size=256x256:duration=0.1", "-c:v", codec,
+                 "-f", "null", "-"],
+                capture_output=True, timeout=10
+            )
+        except Exception:
+            continue
+        if probe.returncode == 0:
+            return (codec, preset, params)
+
+    return SW_ENCODER
+
+def video_write_options() -> Dict[str, Any]:
+    """
+    Keyword arguments for write_videofile using the detected encoder.
+    """
+    codec, preset, params = detect_video_encoder()
+    return {
+        "codec": codec,
+        "preset": preset,
+        # Share the cores between the render processes running at the same time
+        "threads": max(1, (os.cpu_count() or 1) // RENDER_WORKERS),
+        "audio_codec": "aac",
+        # Put the moov atom first so players can start before the download ends
+        "ffmpeg_params": list(params) + GOP_PARAMS + ["-movflags", "+faststart"],
+    }
+
+def copy_video_streams(input_path: str, output_path: str) -> None:
+    """
+    Remux a video into output_path without re-encoding it.
+    """
+    subprocess.run(
+        [FFMPEG_BINARY, "-hide_banner", "-loglevel", "error", "-y",
+         "-i", input_path, "-c", "copy", "-movflags", "+faststart", output_path],
+        check=True, capture_output=True
+    )
 
 class TranscribeWord(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     word: str = ""
     start: float
     end: float
 
 class ReplaceItem(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     find: str
     replace: str
 
 class TextSettings(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     line_color: str
     word_color: str
     all_caps: bool
@@ -63,131 +219,372 @@ class VideoRequest(BaseModel):
     replace: List[ReplaceItem]
     settings: TextSettings
 
-def download_video(url: str) -> str:
+async def _download_single(session: aiohttp.ClientSession, url: str, filename: str) -> None:
+    """
+    Download the whole file over a single connection.
+    """
+    # Stream download to avoid loading large files into memory
+    async with session.get(url) as response:
+        response.raise_for_status()
+        async with aiofiles.open(filename, 'wb', buffering=DOWNLOAD_BUFFER_SIZE) as f:
+            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                await f.write(chunk)
+
+async def _download_range(session: aiohttp.ClientSession, url: str, filename: str,
+                          start: int, end: int) -> bool:
+    """
+    Download bytes start..end (inclusive) and write them at the same offset in the file.
+    Returns False if the server ignored the Range header.
+    """
+    headers = {"Range": f"bytes={start}-{end}", "Accept-Encoding": "identity"}
+    async with session.get(url, headers=headers) as response:
+        response.raise_for_status()
+        if response.status != 206:
+            return False
+        written = 0
+        async with aiofiles.open(filename, 'r+b', buffering=DOWNLOAD_BUFFER_SIZE) as f:
+            await f.seek(start)
+            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                await f.write(chunk)
+                written += len(chunk)
+    return written == end - start + 1
+
+async def _download_parallel(session: aiohttp.ClientSession, url: str, filename: str) -> bool:
+    """
+    Download the file with several concurrent range requests.
+    Returns False if the server doesn't support it, so the caller can fall back.
+    """
+    try:
+        async with session.head(url, allow_redirects=True) as head:
+            head.raise_for_status()
+            size = int(head.headers.get("Content-Length", 0))
+            accept_ranges = head.headers.get("Accept-Ranges", "").lower()
+            # Request the parts from the final location to skip the redirects
+            url = str(head.url)
+    except Exception:
+        return False
+    if accept_ranges != "bytes" or size < MIN_PARALLEL_DOWNLOAD_SIZE:
+        return False
+
+    part_size = -(-size // DOWNLOAD_PARTS)
+    ranges = [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+
+    # Pre-allocate the file so every part can be written at its offset
+    async with aiofiles.open(filename, 'wb') as f:
+        await f.truncate(size)
+
+    tasks = [
+        asyncio.create_task(_download_range(session, url, filename, start, end))
+        for start, end in ranges
+    ]
+    try:
+        # Give up on the first part that fails, the caller falls back to a single stream
+        for part in asyncio.as_completed(tasks):
+            if not await part:
+                return False
+        return True
+    except Exception:
+        return False
+    finally:
+        # Make sure no part keeps writing to the file or holding a connection
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+def _process_alive(pid: int) -> bool:
+    """
+    Whether a process with this pid is still running.
+    """
+    if os.name != "posix":
+        # No cheap check without signalling the process, so keep its files
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def clean_downloads(download_dir: str) -> None:
+    """
+    Remove downloads left behind by server processes that are no longer running,
+    and create the download directory of this process.
+    """
+    for entry in os.scandir("downloads"):
+        if entry.is_dir() and entry.name.isdigit() and entry.path != download_dir \
+                and _process_alive(int(entry.name)):
+            continue
+        if entry.is_dir():
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+    os.makedirs(download_dir, exist_ok=True)
+
+async def _evict_download(url: str) -> None:
+    """
+    Remove a cached download and delete its file, unless a request is using it.
+    """
+    if download_pins.get(url):
+        return
+    # Another request may have evicted it while this one was awaiting
+    cached = download_cache.pop(url, None)
+    if cached is None:
+        return
+    path, _ = cached
+    try:
+        await aiofiles.os.remove(path)
+    except OSError:
+        pass
+
+def release_video(url: str) -> None:
+    """
+    Unpin a video returned by download_video once the request is done with it.
+    """
+    download_pins[url] -= 1
+    if not download_pins[url]:
+        del download_pins[url]
+
+async def download_video(session: aiohttp.ClientSession, download_dir: str, url: str) -> str:
     """
     Download video from URL and return the local file path.
+    Recently downloaded URLs are served from disk without another request.
+    The file stays pinned in the cache until release_video(url) is called.
     """
+    download_pins[url] = download_pins.get(url, 0) + 1
     try:
-        # Generate unique filename
-        filename = f"downloads/{uuid.uuid4()}.mp4"
-        
-        # Stream download to avoid loading large files into memory
-        with requests.get(url, stream=True) as response:
-            response.raise_for_status()
-            with open(filename, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-        
-        return filename
+        return await _fetch_video(session, download_dir, url)
+    except BaseException:
+        release_video(url)
+        raise
+
+async def _fetch_video(session: aiohttp.ClientSession, download_dir: str, url: str) -> str:
+    """
+    Return the cached file for url, downloading it if needed.
+    """
+    now = time.monotonic()
+    cached = download_cache.get(url)
+    if cached:
+        cached_path, last_used = cached
+        if now - last_used < DOWNLOAD_CACHE_TTL and await aiofiles.os.path.exists(cached_path):
+            download_cache[url] = (cached_path, now)
+            download_cache.move_to_end(url)
+            return cached_path
+
+    # Name the file after the URL, and download into a temporary file so
+    # concurrent requests for the same URL never see a partial video
+    filename = os.path.join(download_dir, f"{hashlib.sha256(url.encode()).hexdigest()}.mp4")
+    temp_filename = os.path.join(download_dir, f"{uuid.uuid4()}.part")
+    try:
+        # Use parallel range requests when the server supports them
+        if not await _download_parallel(session, url, temp_filename):
+            await _download_single(session, url, temp_filename)
+        await aiofiles.os.replace(temp_filename, filename)
     except Exception as e:
+        if await aiofiles.os.path.exists(temp_filename):
+            await aiofiles.os.remove(temp_filename)
         raise HTTPException(status_code=500, detail=f"Failed to download video: {str(e)}")
 
+    download_cache[url] = (filename, time.monotonic())
+    download_cache.move_to_end(url)
+    # Drop expired videos, then the least recently used ones once the cache is full.
+    # Videos used by running requests are kept, even if the cache grows past its size.
+    for cached_url, (_, last_used) in list(download_cache.items()):
+        if now - last_used >= DOWNLOAD_CACHE_TTL and not download_pins.get(cached_url):
+            await _evict_download(cached_url)
+    unpinned = [cached_url for cached_url in download_cache if not download_pins.get(cached_url)]
+    for cached_url in unpinned[:max(0, len(download_cache) - DOWNLOAD_CACHE_SIZE)]:
+        await _evict_download(cached_url)
+
+    return filename
+
+# Caption position setting -> MoviePy (horizontal, vertical) position
+_POSITIONS = {
+    "top_left": ("left", "top"),
+    "top_center": ("center", "top"),
+    "top_right": ("right", "top"),
+    "middle_left": ("left", "center"),
+    "middle_center": ("center", "center"),
+    "middle_right": ("right", "center"),
+    "bottom_left": ("left", "bottom"),
+    "bottom_center": ("center", "bottom"),
+    "bottom_right": ("right", "bottom"),
+}
+
+def parse_position(position_str: str) -> tuple:
+    """
+    Convert a position setting such as "bottom_center" into a MoviePy position.
+    """
+    return _POSITIONS.get(position_str.lower(), ("center", "center"))
+
+@functools.lru_cache(maxsize=32)
+def _load_font(font: str, size: int) -> ImageFont.FreeTypeFont:
+    """
+    Load a TrueType font once per (path, size).
+    """
+    return ImageFont.truetype(font, size)
+
+@functools.lru_cache(maxsize=4096)
+def _render_text_bitmap(text: str, font: str, size: int, color: str, outline_width: int = 0) -> np.ndarray:
+    """
+    Rasterize text once with Pillow and return it as an RGBA array.
+    Identical words reuse the cached bitmap instead of being rendered again.
+    """
+    pil_font = _load_font(font, size)
+    left, top, right, bottom = pil_font.getbbox(text, stroke_width=outline_width)
+
+    img = Image.new("RGBA", (max(1, right - left), max(1, bottom - top)), (0, 0, 0, 0))
+    ImageDraw.Draw(img).text(
+        (-left, -top),
+        text,
+        font=pil_font,
+        fill=color,
+        stroke_width=outline_width,
+        stroke_fill="black"
+    )
+
+    rgba = np.asarray(img)
+    # The array is shared between cache hits, so make sure nobody modifies it
+    rgba.flags.writeable = False
+    return rgba
+
 def process_transcription(video_path: str, transcribe: List[TranscribeWord], 
                           replace_words: List[ReplaceItem], settings: TextSettings) -> str:
     """
-    Process video by dividing it according to transcription timestamps and adding text overlays.
+    Process video by adding a text overlay for each transcribed word on top of the original timeline.
     """
-    # Load video
+    # Load video and read its metadata once
     video = VideoFileClip(video_path)
-    # Track all created clips
-    clips = []
+    duration = float(video.duration)
+    size = video.size
+    # Track all created text overlays
+    txt_clips = []
     
-    # Word replacements dictionary for censoring
-    replacements = {item.find: item.replace for item in replace_words}
+    # Word replacements for censoring, last entry first so that later
+    # entries win when several match at the same position
+    replace_items = list(reversed(replace_words))
+    # Single case-insensitive pattern with one capture group per find string,
+    # so the matched entry is known without re-lowercasing the text
+    replace_pattern = None
+    if replace_items:
+        replace_pattern = re.compile(
+            "|".join(f"({re.escape(item.find)})" for item in replace_items),
+            re.IGNORECASE
+        )
 
-    # Process each transcription item
-    previous_end_time = 0
-    
-    for i, word_data in enumerate(transcribe):
-        start_time = word_data.start
-        end_time = word_data.end
-        
-        # Skip invalid time ranges
-        if end_time <= start_time or start_time < 0 or end_time > video.duration:
-            continue
-            
-        # Check if there's a gap between previous word and current word
-        if previous_end_time > 0 and start_time > previous_end_time:
-            # Create a silent clip for the gap
-            gap_clip = video.subclipped(previous_end_time, start_time)
-            clips.append(gap_clip)
-            print(f"Added silent gap clip from {previous_end_time} to {start_time}")
-        
-        # Update previous_end_time for the next iteration
-        previous_end_time = end_time
-        
-        # For empty words, add the clip without text overlay
-        if not word_data.word:
-            word_clip = video.subclipped(start_time, end_time)
-            clips.append(word_clip)
+    # Split the transcription into parallel arrays so invalid time ranges
+    # are filtered in one vectorized pass
+    starts = np.fromiter((w.start for w in transcribe), dtype=float, count=len(transcribe))
+    ends = np.fromiter((w.end for w in transcribe), dtype=float, count=len(transcribe))
+    words = [w.word for w in transcribe]
+    valid = (ends > starts) & (starts >= 0) & (ends <= duration)
+    valid_indices = np.flatnonzero(valid)
+
+    # Resolve the displayed text once per distinct word rather than per occurrence
+    display_words = {}
+    for word in {words[i] for i in valid_indices}:
+        if not word:
             continue
-            
-        # Get word, applying replacements if needed
-        display_word = word_data.word
-        
-        for find, replace in replacements.items():
-            if find.lower() in display_word.lower():
-                display_word = replace
-                
+        # Apply replacements if needed
+        display_word = word
+        match = replace_pattern.search(display_word) if replace_pattern else None
+        if match:
+            display_word = replace_items[match.lastindex - 1].replace
         # Apply text formatting from settings
         if settings.all_caps:
             display_word = display_word.upper()
+        display_words[word] = display_word
+
+    # Same caption position for every word
+    position = parse_position(settings.position)
+
+    # Process each valid transcription item
+    for i in valid_indices:
+        start_time = float(starts[i])
+        end_time = float(ends[i])
         
-        word_clip = video.subclipped(start_time, end_time)
-        # Create text clip
-        txt_clip = TextClip(
-            text=display_word,
-            font = "./font/font.ttf",
-            font_size=settings.font_size,
-            color=settings.word_color,
-            duration=end_time - start_time
+        # Empty words keep the original frames without a text overlay
+        if not words[i]:
+            continue
+            
+        display_word = display_words[words[i]]
+        
+        # Create text clip from the cached bitmap, shown only while the word is spoken
+        bitmap = _render_text_bitmap(
+            display_word,
+            FONT_PATH,
+            settings.font_size,
+            settings.word_color,
+            settings.outline_width
         )
-        # Position text based on settings
-        # if settings.position == "middle_center":
-        #     txt_clip = txt_clip.text_align("center")
-        # elif settings.position == "bottom_center":
-        #     txt_clip = txt_clip.text_align("center")
-        # elif settings.position == "top_center":
-        #     txt_clip = txt_clip.text_align("center")
-        # Set duration to match the word's duration
-        # Combine video and text
-        composite = CompositeVideoClip([word_clip, txt_clip])
-        clips.append(composite)
+        txt_clip = ImageClip(
+            bitmap,
+            is_mask=False,
+            transparent=True,
+            duration=end_time - start_time
+        ).with_start(start_time).with_end(end_time).with_position(position)
+        txt_clips.append(txt_clip)
     
-    # Concatenate all clips
-    if clips:
-        final_clip = concatenate_videoclips(clips)
+    # Without any overlay the frames are unchanged, so copy the streams
+    # instead of decoding and re-encoding the whole video
+    if valid_indices.size and not txt_clips:
+        output_filename = f"{uuid.uuid4()}.mp4"
+        output_path = f"output/{output_filename}"
+        try:
+            copy_video_streams(video_path, output_path)
+            video.close()
+            return output_filename
+        except subprocess.CalledProcessError:
+            # The source codecs can't be stored in MP4 as they are, so encode instead
+            if os.path.exists(output_path):
+                os.remove(output_path)
+
+    # Layer all overlays on the original video so it is decoded and encoded once
+    if valid_indices.size:
+        final_clip = CompositeVideoClip([video] + txt_clips, size=size)
         
         # Generate output filename with UUID
         output_filename = f"{uuid.uuid4()}.mp4"
         output_path = f"output/{output_filename}"
         
         # Write final video
-        final_clip.write_videofile(output_path, codec="libx264")
+        final_clip.write_videofile(output_path, **video_write_options())
         
         # Close clips to release resources
         final_clip.close()
-        for clip in clips:
+        for clip in txt_clips:
             clip.close()
         video.close()
         
         return output_filename
     else:
         video.close()
-        raise HTTPException(status_code=400, detail="No valid word segments found in transcription")
+        # Positional arguments so the exception can be pickled back from the worker process
+        raise HTTPException(400, "No valid word segments found in transcription")
 
 @app.post("/v1/video/caption")
 async def process_video_action(data: VideoRequest):
-    # Download the video file
-    local_video_path = download_video(data.video_url)
+    # Download the video file, or reuse it if the URL was fetched recently
+    local_video_path = await download_video(
+        app.state.http_session, app.state.download_dir, data.video_url
+    )
+    process_pool = app.state.process_pool
+    render = None
     try:
-        # Process the video with MoviePy
-        output_filename = process_transcription(
+        # Process the video with MoviePy in a worker process to keep the event loop free
+        render = asyncio.get_running_loop().run_in_executor(
+            process_pool,
+            process_transcription,
             local_video_path, 
             data.transcribe, 
             data.replace, 
             data.settings
         )
+        # Shielded so a cancelled request doesn't look like a finished render
+        output_filename = await asyncio.shield(render)
         
         # Generate the full URL for the processed video
         video_url = f"{BASE_URL}/videos/{output_filename}"
@@ -200,12 +597,25 @@ async def process_video_action(data: VideoRequest):
         }
         
         return response
+    except BrokenProcessPool as e:
+        # A worker died (e.g. killed for running out of memory), which breaks
+        # the whole pool, so replace it once for the following requests
+        if app.state.process_pool is process_pool:
+            app.state.process_pool = create_process_pool()
+            process_pool.shutdown(wait=False)
+        raise HTTPException(status_code=500, detail=f"Error processing video: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing video: {str(e)}")
     finally:
-        # Clean up the downloaded file
-        try:
-            if os.path.exists(local_video_path):
-                os.remove(local_video_path)
-        except:
-            pass
\ No newline at end of file
+        # Keep the source video pinned until the worker is done with it
+        if render is not None and not render.done():
+            render.add_done_callback(lambda _: release_video(data.video_url))
+        else:
+            release_video(data.video_url)
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # The worker count follows WEB_CONCURRENCY (default 1); each worker
+    # already renders videos in its own process pool
+    uvicorn.run("app:app", host="0.0.0.0", port=8000, loop="uvloop", http="httptools")